@@ -3,6 +3,7 @@ import numpy as np
 import time
 import mediapipe as mp
 from utils.preprocess import dataPreprocess
+from utils.cache import get_default_cache
 
 class CameraHandler:
     def __init__(self, frames_per_word=35, total_words=3):
@@ -21,7 +22,7 @@ class CameraHandler:
         self.word_started = False
 
         # Preprocesamiento
-        self.preprocessor = dataPreprocess()
+        self.preprocessor = dataPreprocess(cache=get_default_cache())
 
         # Cuenta atrás para cada palabra
         self.countdown_start_time = None
@@ -1,8 +1,10 @@
 import numpy as np
 import os
 import subprocess
+import tempfile
+import threading
 import time
-import tensorflow as tf
+from concurrent.futures import ThreadPoolExecutor
 
 
 # Ruta base del script actual
@@ -17,9 +19,16 @@ REMOTE_SCRIPT = "/home/mendel/remote_inference.py"
 REMOTE_INPUT = "/home/mendel/tensor.npy"
 REMOTE_OUTPUT = "/home/mendel/result.npy"
 
+# Versión del modelo desplegado: subirla al reentrenar o cambiar REMOTE_MODEL
+# para que no se reutilicen probabilidades cacheadas del modelo anterior
+MODEL_VERSION = 1
 
 
-def get_remote_device():
+
+def get_remote_devices():
+    """
+    Devuelve los hostnames de todas las Coral visibles con `mdt devices`.
+    """
     try:
         result = subprocess.run(["mdt", "devices"], capture_output=True, text=True)
         lines = [line.strip() for line in result.stdout.strip().split("\n") if line.strip()]
@@ -27,57 +36,80 @@ def get_remote_device():
         if not lines:
             raise Exception("No se encontró ningún dispositivo Coral conectado con MDT.")
 
-        hostname = lines[0].split()[0]
-        print(f"📡 Coral detectada: {hostname}")
-        return hostname
+        hostnames = [line.split()[0] for line in lines]
+        for hostname in hostnames:
+            print(f"📡 Coral detectada: {hostname}")
+        return hostnames
 
     except Exception as e:
         print("⚠️ No se pudo detectar la Coral con MDT:", e)
-        return None
+        return []
+
+
+def get_remote_device():
+    hostnames = get_remote_devices()
+    return hostnames[0] if hostnames else None
+
+
+def _mdt_env(hostname):
+    # MDT_TARGET selecciona la Coral destino cuando hay varias conectadas
+    env = os.environ.copy()
+    env["MDT_TARGET"] = hostname
+    return env
+
+
+def model_fingerprint():
+    """
+    Identidad del modelo para las claves de caché: MODEL_VERSION más el
+    tamaño y mtime de MODEL_CPU (la Coral no se puede consultar sin MDT).
+    """
+    try:
+        st = os.stat(MODEL_CPU)
+        return (MODEL_VERSION, st.st_size, st.st_mtime_ns)
+    except OSError:
+        return (MODEL_VERSION, None, None)
 
 
-def try_remote_tpu_inference(input_tensor):
+def try_remote_tpu_inference(input_tensor, hostname=None):
     try:
-        hostname = get_remote_device()
+        if hostname is None:
+            hostname = get_remote_device()
         if hostname is None:
             raise Exception("No se pudo detectar Coral con MDT")
 
-        print("🔁 Enviando tensor a la Coral TPU con MDT...")
-        local_input = "tensor.npy"
-        local_output = "."
+        print(f"🔁 Enviando tensor a la Coral TPU {hostname} con MDT...")
+        env = _mdt_env(hostname)
 
-        # Guardar el tensor localmente
-        np.save(local_input, input_tensor)
-        time.sleep(1)  # Espera por seguridad
+        # Directorio propio por llamada para no pisar ficheros de otras Corals
+        with tempfile.TemporaryDirectory(prefix=f"coral_{hostname}_") as workdir:
+            local_input = os.path.join(workdir, "tensor.npy")
+            local_output = os.path.join(workdir, "result.npy")
 
-        if not os.path.exists(local_input):
-            raise Exception("tensor.npy no se ha creado")
-        else:
-            print("tensor.npy existe, tamaño:", os.path.getsize(local_input), "bytes")
+            # Guardar el tensor localmente
+            np.save(local_input, input_tensor)
 
-        # Subir el tensor al dispositivo remoto
-        subprocess.run(["mdt", "push", local_input], check=True)
+            if not os.path.exists(local_input):
+                raise Exception("tensor.npy no se ha creado")
+            else:
+                print("tensor.npy existe, tamaño:", os.path.getsize(local_input), "bytes")
 
-        # Ejecutar script remoto que corre la inferencia
-        subprocess.run(["mdt", "exec", "python3", REMOTE_SCRIPT], check=True)
+            # Subir el tensor al dispositivo remoto
+            subprocess.run(["mdt", "push", local_input, REMOTE_INPUT], check=True, env=env)
 
-        # Descargar el resultado de vuelta
-        subprocess.run(["mdt", "pull", REMOTE_OUTPUT, local_output], check=True)
+            # Ejecutar script remoto que corre la inferencia
+            subprocess.run(["mdt", "exec", "python3", REMOTE_SCRIPT], check=True, env=env)
 
-        # Limpiar archivos temporales en Coral
-        subprocess.run(["mdt", "exec", "rm /home/mendel/tensor.npy"], check=True)
-        print("done rm 1")
-        subprocess.run(["mdt", "exec", "rm /home/mendel/result.npy"], check=True)
-        print("done rm 2")
+            # Descargar el resultado de vuelta
+            subprocess.run(["mdt", "pull", REMOTE_OUTPUT, workdir], check=True, env=env)
 
-        # Cargar resultado en CPU
-        output = np.load("result.npy")
+            # Limpiar archivos temporales en Coral
+            subprocess.run(["mdt", "exec", f"rm {REMOTE_INPUT}"], check=True, env=env)
+            subprocess.run(["mdt", "exec", f"rm {REMOTE_OUTPUT}"], check=True, env=env)
 
-        # Limpiar archivos locales
-        os.remove(local_input)
-        os.remove("result.npy")
+            # Cargar resultado en CPU (los ficheros locales se borran al salir)
+            output = np.load(local_output)
 
-        print("✅ Inference done on remote Edge TPU")
+        print(f"✅ Inference done on remote Edge TPU {hostname}")
         return output
 
     except Exception as e:
@@ -88,6 +120,9 @@ def try_local_cpu_inference(input_tensor):
     try:
         print("💻 Ejecutando inferencia en CPU local...")
 
+        # Import diferido: el pool y FakeDevice se pueden usar sin TensorFlow
+        import tensorflow as tf
+
         interpreter = tf.lite.Interpreter(model_path=MODEL_CPU)
         interpreter.allocate_tensors()
 
@@ -107,14 +142,318 @@ def try_local_cpu_inference(input_tensor):
 
 
 
-def run_inference(input_tensor):
-    input_tensor = input_tensor.astype(np.float32)
-    input_tensor = np.expand_dims(input_tensor, axis=0)  # Añade batch dimension
+class EdgeTPUDevice:
+    """
+    Coral remota accesible por MDT. Solo admite una inferencia a la vez,
+    ya que los ficheros de entrada/salida en la placa son fijos.
+    """
+    def __init__(self, hostname):
+        self.name = hostname
+        self.hostname = hostname
+
+    def infer(self, input_tensor):
+        return try_remote_tpu_inference(input_tensor, self.hostname)
+
+
+class LocalCPUDevice:
+    """
+    CPU local usada como un carril más del pool.
+    """
+    def __init__(self):
+        self.name = "cpu"
+
+    def infer(self, input_tensor):
+        return try_local_cpu_inference(input_tensor)
+
+
+class FakeDevice:
+    """
+    Dispositivo simulado para probar el pool sin hardware.
+
+    Devuelve un vector one-hot con la clase indicada por `predict_fn`
+    (por defecto, la suma del tensor módulo `num_classes`) tras dormir
+    `latency` segundos. Si `fail` es True, la inferencia falla siempre;
+    con `fail_calls` solo fallan las primeras llamadas.
+    """
+    def __init__(self, name, latency=0.05, num_classes=250, predict_fn=None, fail=False, fail_calls=0):
+        self.name = name
+        self.latency = latency
+        self.num_classes = num_classes
+        self.predict_fn = predict_fn
+        self.fail = fail
+        self.fail_calls = fail_calls
+        self.calls = 0
+
+    def infer(self, input_tensor):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail or self.calls <= self.fail_calls:
+            return None
+
+        if self.predict_fn is not None:
+            pred_idx = int(self.predict_fn(input_tensor))
+        else:
+            pred_idx = int(abs(float(np.sum(input_tensor)))) % self.num_classes
 
-    # Intentar primero en la Coral TPU
-    output = try_remote_tpu_inference(input_tensor)
-    if output is not None:
+        output = np.zeros((1, self.num_classes), dtype=np.float32)
+        output[0, pred_idx] = 1.0
         return output
 
-    # Si falla, usar CPU local
-    return try_local_cpu_inference(input_tensor)
+
+class NoDeviceAvailableError(RuntimeError):
+    """
+    Ningún dispositivo del pool pudo completar la inferencia.
+    """
+
+
+class DevicePool:
+    """
+    Reparte inferencias entre varios dispositivos (Corals + CPU) en paralelo.
+
+    Cada tarea se asigna al dispositivo con menor tiempo estimado de
+    finalización: (tareas en curso + 1) * latencia media observada.
+    Los dispositivos sin latencia medida se prueban primero, con una sola
+    tarea hasta que se mida la primera. Si un dispositivo falla, la tarea
+    se reintenta en los restantes y ese dispositivo queda en espera
+    `failure_backoff` segundos (el doble tras cada fallo seguido, hasta
+    `max_backoff`). Pasada la espera recibe una única tarea de prueba;
+    si responde vuelve a usarse con normalidad.
+
+    Si se pasa `discover` (función que devuelve la lista de dispositivos
+    disponibles), el pool se resincroniza cada `refresh_interval` segundos,
+    o cada `retry_interval` si no queda ningún acelerador sano, añadiendo
+    y quitando dispositivos por nombre.
+    """
+    def __init__(self, devices=None, latency_smoothing=0.3, discover=None,
+                 refresh_interval=30.0, retry_interval=5.0,
+                 failure_backoff=1.0, max_backoff=30.0):
+        self.latency_smoothing = latency_smoothing  # Peso de la última medida en la media móvil
+        self.failure_backoff = failure_backoff
+        self.max_backoff = max_backoff
+        self.discover = discover
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._last_refresh = time.monotonic()
+        self._device_locks = {}
+        self._stats = {}
+        self.devices = []
+
+        if devices is None and discover is not None:
+            devices = discover()
+        if not devices:
+            raise ValueError("DevicePool necesita al menos un dispositivo")
+        self._set_devices(devices)
+
+    def _set_devices(self, devices):
+        # Se conservan las estadísticas de los dispositivos que ya se conocían
+        with self._lock:
+            current = {d.name: d for d in self.devices}
+            updated = []
+            for device in devices:
+                device = current.get(device.name, device)
+                if device.name not in self._stats:
+                    self._device_locks[device.name] = threading.Lock()
+                    self._stats[device.name] = {
+                        "calls": 0, "failures": 0, "consecutive_failures": 0,
+                        "in_flight": 0, "avg_latency": None, "cooldown_until": 0.0,
+                    }
+                elif device.name not in current:
+                    # Dispositivo que vuelve a aparecer: se le da otra oportunidad
+                    self._stats[device.name]["consecutive_failures"] = 0
+                    self._stats[device.name]["cooldown_until"] = 0.0
+                updated.append(device)
+            self.devices = updated
+
+    def _has_healthy_accelerator(self):
+        with self._lock:
+            return any(
+                not isinstance(d, LocalCPUDevice) and self._stats[d.name]["consecutive_failures"] == 0
+                for d in self.devices
+            )
+
+    def refresh(self):
+        """
+        Vuelve a detectar los dispositivos con `discover` y actualiza el pool.
+        """
+        if self.discover is None:
+            return
+        devices = self.discover()
+        self._last_refresh = time.monotonic()
+        if devices:
+            self._set_devices(devices)
+
+    def _maybe_refresh(self):
+        if self.discover is None:
+            return
+        elapsed = time.monotonic() - self._last_refresh
+        if elapsed < self.retry_interval:
+            return
+        if elapsed < self.refresh_interval and self._has_healthy_accelerator():
+            return
+        # Solo un hilo relanza la detección; el resto sigue con el pool actual
+        if self._refresh_lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+
+    def _expected_finish(self, device):
+        stats = self._stats[device.name]
+        if stats["avg_latency"] is None:
+            # Sin medida aún: se prueba primero, pero con una sola tarea a la vez
+            return 0.0 if stats["in_flight"] == 0 else float("inf")
+        return (stats["in_flight"] + 1) * stats["avg_latency"]
+
+    def _load_key(self, device, now):
+        # Los dispositivos en espera tras un fallo solo se usan si no queda otro
+        stats = self._stats[device.name]
+        cooling = now < stats["cooldown_until"]
+        return (cooling, self._expected_finish(device), stats["in_flight"])
+
+    def _acquire_device(self, exclude):
+        with self._lock:
+            candidates = [d for d in self.devices if d.name not in exclude]
+            if not candidates:
+                return None
+            now = time.monotonic()
+            device = min(candidates, key=lambda d: self._load_key(d, now))
+            stats = self._stats[device.name]
+            stats["in_flight"] += 1
+            if stats["consecutive_failures"] > 0:
+                # Tarea de prueba: el resto sigue esquivándolo hasta conocer el resultado
+                stats["cooldown_until"] = now + self.max_backoff
+            return device
+
+    def _release_device(self, device, latency, ok):
+        with self._lock:
+            stats = self._stats[device.name]
+            stats["in_flight"] -= 1
+            stats["calls"] += 1
+            if not ok:
+                stats["failures"] += 1
+                stats["consecutive_failures"] += 1
+                backoff = self.failure_backoff * 2 ** (stats["consecutive_failures"] - 1)
+                stats["cooldown_until"] = time.monotonic() + min(backoff, self.max_backoff)
+                return
+            stats["consecutive_failures"] = 0
+            stats["cooldown_until"] = 0.0
+            if stats["avg_latency"] is None:
+                stats["avg_latency"] = latency
+            else:
+                a = self.latency_smoothing
+                stats["avg_latency"] = a * latency + (1 - a) * stats["avg_latency"]
+
+    def run(self, input_tensor):
+        """
+        Ejecuta una inferencia en el dispositivo menos cargado.
+        Lanza NoDeviceAvailableError si todos los dispositivos fallan.
+        """
+        self._maybe_refresh()
+
+        tried = set()
+        while True:
+            device = self._acquire_device(tried)
+            if device is None:
+                raise NoDeviceAvailableError(
+                    f"La inferencia falló en todos los dispositivos: {', '.join(sorted(tried))}"
+                )
+            tried.add(device.name)
+
+            output = None
+            latency = 0.0
+            try:
+                with self._device_locks[device.name]:
+                    # Solo se mide la inferencia, no la espera por el dispositivo
+                    start = time.perf_counter()
+                    output = device.infer(input_tensor)
+                    latency = time.perf_counter() - start
+            except Exception as e:
+                print(f"⚠️ Fallo en el dispositivo {device.name}:", e)
+            finally:
+                self._release_device(device, latency, output is not None)
+
+            if output is not None:
+                return output
+
+    def _run_or_none(self, input_tensor):
+        try:
+            return self.run(input_tensor)
+        except NoDeviceAvailableError as e:
+            print("❌", e)
+            return None
+
+    def run_batch(self, input_tensors):
+        """
+        Ejecuta varias inferencias en paralelo y devuelve las salidas en orden.
+        Las entradas que fallan en todos los dispositivos devuelven None.
+        """
+        if len(input_tensors) == 0:
+            return []
+        workers = min(len(self.devices), len(input_tensors))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._run_or_none, input_tensors))
+
+    def stats(self):
+        """
+        Copia de las estadísticas por dispositivo activo (llamadas, fallos, en curso, latencia media).
+        """
+        with self._lock:
+            return {d.name: dict(self._stats[d.name]) for d in self.devices}
+
+
+def discover_devices():
+    """
+    Todas las Corals detectadas con MDT más la CPU local.
+    """
+    devices = [EdgeTPUDevice(h) for h in get_remote_devices()]
+    devices.append(LocalCPUDevice())
+    return devices
+
+
+_device_pool = None
+_device_pool_lock = threading.Lock()
+
+
+def get_device_pool():
+    """
+    Pool por defecto, que vuelve a buscar Corals periódicamente.
+    """
+    global _device_pool
+    with _device_pool_lock:
+        if _device_pool is None:
+            _device_pool = DevicePool(discover=discover_devices)
+        return _device_pool
+
+
+def set_device_pool(pool):
+    """
+    Sustituye el pool por defecto (p. ej. por uno de FakeDevice en pruebas).
+    """
+    global _device_pool
+    with _device_pool_lock:
+        _device_pool = pool
+
+
+def _prepare_input(input_tensor):
+    input_tensor = np.asarray(input_tensor, dtype=np.float32)  # Sin copia si ya es float32
+    return np.expand_dims(input_tensor, axis=0)  # Añade batch dimension (vista)
+
+
+def run_inference(input_tensor):
+    """
+    Inferencia de una sola palabra. Lanza NoDeviceAvailableError si no
+    hay ningún dispositivo que pueda ejecutarla.
+    """
+    return get_device_pool().run(_prepare_input(input_tensor))
+
+
+def run_inference_batch(input_tensors):
+    """
+    Envía cada palabra de la frase a los dispositivos del pool de forma
+    concurrente y devuelve las salidas en el mismo orden (None para las
+    palabras que no se pudieron inferir en ningún dispositivo).
+    """
+    return get_device_pool().run_batch([_prepare_input(t) for t in input_tensors])
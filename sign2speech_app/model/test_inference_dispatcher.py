@@ -0,0 +1,115 @@
+"""
+Pruebas del DevicePool con dispositivos simulados (sin Coral ni modelo).
+
+Ejecutar desde sign2speech_app/:  python -m pytest model/test_inference_dispatcher.py
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from model.inference_dispatcher import DevicePool, FakeDevice, NoDeviceAvailableError
+
+
+def _words(n):
+    # El índice de cada palabra va en el primer valor para poder comprobar el orden
+    words = []
+    for i in range(n):
+        x = np.zeros((1, 64, 88, 3), dtype=np.float32)
+        x[0, 0, 0, 0] = i
+        words.append(x)
+    return words
+
+
+def _predict_first(x):
+    return x[0, 0, 0, 0]
+
+
+class _OverlapTracker:
+    # Cuenta cuántas llamadas a infer se solapan entre todos los dispositivos
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+
+class _TrackedDevice(FakeDevice):
+    def __init__(self, name, tracker, **kwargs):
+        super().__init__(name, **kwargs)
+        self.tracker = tracker
+
+    def infer(self, input_tensor):
+        with self.tracker.lock:
+            self.tracker.active += 1
+            self.tracker.peak = max(self.tracker.peak, self.tracker.active)
+        try:
+            return super().infer(input_tensor)
+        finally:
+            with self.tracker.lock:
+                self.tracker.active -= 1
+
+
+def test_run_batch_is_concurrent_and_keeps_order():
+    tracker = _OverlapTracker()
+    devices = [_TrackedDevice(name, tracker, latency=0.1, predict_fn=_predict_first) for name in ("a", "b")]
+    pool = DevicePool(devices)
+
+    outputs = pool.run_batch(_words(6))
+
+    assert [int(np.argmax(o)) for o in outputs] == list(range(6))
+    assert tracker.peak == 2
+    assert all(d.calls > 0 for d in devices)
+
+
+def test_failing_device_is_retried_elsewhere_and_cooled_down():
+    bad = FakeDevice("bad", latency=0.01, fail=True)
+    good = FakeDevice("good", latency=0.01, predict_fn=_predict_first)
+    pool = DevicePool([bad, good], failure_backoff=60.0)
+
+    outputs = pool.run_batch(_words(5))
+
+    # Dentro de la espera el dispositivo que falló no vuelve a usarse
+    assert [int(np.argmax(o)) for o in outputs] == list(range(5))
+    assert bad.calls == 1
+    assert pool.stats()["bad"]["consecutive_failures"] == 1
+
+
+def test_device_that_fails_once_recovers_after_backoff():
+    flaky = FakeDevice("coral1", latency=0.01, fail_calls=1, predict_fn=_predict_first)
+    fast = FakeDevice("coral2", latency=0.01, predict_fn=_predict_first)
+    slow = FakeDevice("cpu", latency=0.05, predict_fn=_predict_first)
+    pool = DevicePool([flaky, fast, slow], failure_backoff=0.05)
+
+    pool.run_batch(_words(6))
+    time.sleep(0.1)  # Pasa la espera tras el fallo
+    for _ in range(4):
+        outputs = pool.run_batch(_words(6))
+        assert [int(np.argmax(o)) for o in outputs] == list(range(6))
+
+    assert flaky.calls > 2
+    assert pool.stats()["coral1"]["consecutive_failures"] == 0
+
+
+def test_all_devices_failing_raises():
+    pool = DevicePool([FakeDevice("x", latency=0.0, fail=True), FakeDevice("y", latency=0.0, fail=True)])
+
+    with pytest.raises(NoDeviceAvailableError):
+        pool.run(_words(1)[0])
+    assert pool.run_batch(_words(2)) == [None, None]
+
+
+def test_discover_adds_and_removes_devices():
+    cpu = FakeDevice("cpu", latency=0.0)
+    found = [cpu]
+    pool = DevicePool(discover=lambda: list(found), refresh_interval=0.0, retry_interval=0.0)
+    assert list(pool.stats()) == ["cpu"]
+
+    coral = FakeDevice("coral", latency=0.0)
+    found.append(coral)
+    pool.run(_words(1)[0])
+    assert list(pool.stats()) == ["cpu", "coral"]
+
+    found.remove(coral)
+    pool.run(_words(1)[0])
+    assert list(pool.stats()) == ["cpu"]
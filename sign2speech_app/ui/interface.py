@@ -7,6 +7,7 @@ from PyQt5.QtCore import QTimer, Qt
 from core.camera_handler import CameraHandler
 from LLM.llm import generate_sentence_from_words
 from TTS.tts import speak_text
+from utils.cache import get_default_cache
 import cv2
 
 
@@ -174,6 +175,13 @@ class MainWindow(QMainWindow):
                     self.log_message(f"[RESULTADO] {' '.join(palabras)}")
                     self.log_message(f"[FRASE] {frase}")
 
+                    cache_stats = get_default_cache().stats()["namespaces"]
+                    for namespace in ("pre", "probs"):
+                        if namespace in cache_stats:
+                            s = cache_stats[namespace]
+                            self.log_message(f"[CACHE] {namespace}: hit rate {s['hit_rate']:.0%}, "
+                                             f"{s['bytes_saved']} bytes de entrada sin reprocesar")
+
                     speak_text(frase)
 
         else:
@@ -0,0 +1,245 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Tamaño máximo por defecto de la caché en memoria y en disco (bytes)
+MAX_BYTES = 64 * 1024 * 1024
+MAX_DISK_BYTES = 512 * 1024 * 1024
+
+
+def array_digest(array, *extra):
+    """
+    Hash rápido (BLAKE2b) del contenido de un array más parámetros extra.
+    Incluye shape y dtype para que dos arrays con los mismos bytes no colisionen.
+    """
+    array = np.ascontiguousarray(array)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str((array.shape, array.dtype.str, extra)).encode())
+    h.update(memoryview(array).cast("B"))
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Caché direccionada por contenido para tensores preprocesados y
+    probabilidades de clase.
+
+    - Nivel en memoria con expulsión LRU limitado a `max_bytes`.
+    - Nivel opcional en disco (`disk_dir`): un .npy por clave, con expulsión
+      LRU limitada a `max_disk_bytes`. El orden LRU se guarda en el mtime
+      de cada fichero, que se actualiza en cada acierto, así que sobrevive
+      entre ejecuciones.
+    - Estadísticas por espacio de nombres ("pre", "probs"...): aciertos,
+      fallos, `bytes_served` (tamaño de los resultados servidos desde caché)
+      y `bytes_saved` (tamaño de las entradas que no hubo que reprocesar,
+      p. ej. el tensor que no se envió a la Coral).
+    """
+    def __init__(self, max_bytes=MAX_BYTES, disk_dir=None, max_disk_bytes=MAX_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clave → array (orden LRU)
+        self._bytes = 0
+        self._evictions = 0
+        self._disk_entries = OrderedDict()  # clave → tamaño del fichero (orden LRU)
+        self._disk_bytes = 0
+        self._disk_evictions = 0
+        self._stats = {}
+
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def make_key(self, namespace, array, *extra):
+        return f"{namespace}-{array_digest(array, *extra)}"
+
+    def _namespace_stats(self, key):
+        namespace = key.split("-", 1)[0]
+        return self._stats.setdefault(
+            namespace, {"hits": 0, "disk_hits": 0, "misses": 0, "bytes_served": 0, "bytes_saved": 0}
+        )
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.npy")
+
+    def _load_disk_index(self):
+        # Reconstruye el orden LRU del disco a partir del mtime de los ficheros
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".npy"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            files.append((st.st_mtime_ns, name[:-len(".npy")], st.st_size))
+
+        for _, key, size in sorted(files):
+            self._disk_entries[key] = size
+            self._disk_bytes += size
+        self._trim_disk()
+
+    def _trim_disk(self):
+        # Se asume que se tiene el lock
+        while self._disk_bytes > self.max_disk_bytes and self._disk_entries:
+            key, size = self._disk_entries.popitem(last=False)
+            self._disk_bytes -= size
+            self._disk_evictions += 1
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def _insert(self, key, value):
+        # Se asume que se tiene el lock
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key).nbytes
+        if value.nbytes > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._bytes += value.nbytes
+
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self._evictions += 1
+
+    def get(self, key, saved_bytes=None):
+        """
+        Devuelve el array cacheado (de solo lectura) o None si no existe.
+
+        `saved_bytes` es el tamaño de la entrada cuyo procesado evita un
+        acierto; si no se indica se usa el tamaño del resultado.
+        """
+        with self._lock:
+            stats = self._namespace_stats(key)
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                stats["hits"] += 1
+                stats["bytes_served"] += value.nbytes
+                stats["bytes_saved"] += value.nbytes if saved_bytes is None else saved_bytes
+                return value
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                value = np.load(path)
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                value.flags.writeable = False
+                try:
+                    os.utime(path)  # Refresca su posición LRU en disco
+                except OSError:
+                    pass
+                with self._lock:
+                    if key in self._disk_entries:
+                        self._disk_entries.move_to_end(key)
+                    self._insert(key, value)
+                    stats["disk_hits"] += 1
+                    stats["bytes_served"] += value.nbytes
+                    stats["bytes_saved"] += value.nbytes if saved_bytes is None else saved_bytes
+                return value
+
+        with self._lock:
+            stats["misses"] += 1
+        return None
+
+    def put(self, key, value):
+        """
+        Guarda `value` sin copiarlo y lo devuelve. El array pasa a ser de solo
+        lectura, así que no debe modificarse después.
+        """
+        value = np.asarray(value)
+        value.flags.writeable = False
+
+        with self._lock:
+            self._insert(key, value)
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    np.save(f, value)
+                os.replace(tmp_path, path)  # Escritura atómica
+                size = os.path.getsize(path)
+            except OSError as e:
+                print("⚠️ No se pudo guardar en la caché de disco:", e)
+                return value
+
+            with self._lock:
+                self._disk_bytes -= self._disk_entries.pop(key, 0)
+                self._disk_entries[key] = size
+                self._disk_bytes += size
+                self._trim_disk()
+        return value
+
+    def clear(self, disk=False):
+        """
+        Vacía la caché en memoria y, si `disk` es True, también los .npy del disco.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if disk and self.disk_dir is not None:
+                for name in os.listdir(self.disk_dir):
+                    if name.endswith(".npy"):
+                        try:
+                            os.remove(os.path.join(self.disk_dir, name))
+                        except OSError:
+                            pass
+                self._disk_entries.clear()
+                self._disk_bytes = 0
+
+    def stats(self):
+        """
+        Estado global de la caché; las estadísticas por espacio de nombres
+        van anidadas en "namespaces".
+        """
+        with self._lock:
+            namespaces = {}
+            for namespace, s in self._stats.items():
+                s = dict(s)
+                lookups = s["hits"] + s["disk_hits"] + s["misses"]
+                s["hit_rate"] = (s["hits"] + s["disk_hits"]) / lookups if lookups else 0.0
+                namespaces[namespace] = s
+            return {
+                "namespaces": namespaces,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self._evictions,
+                "disk_entries": len(self._disk_entries),
+                "disk_bytes": self._disk_bytes,
+                "disk_evictions": self._disk_evictions,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Caché compartida por el preprocesado y la inferencia (solo en memoria).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
+
+
+def set_default_cache(cache):
+    """
+    Sustituye la caché por defecto (p. ej. por una con `disk_dir`).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = cache
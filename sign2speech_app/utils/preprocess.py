@@ -4,14 +4,25 @@ import numpy as np
 INPUT_SIZE = 64       # Longitud objetivo de cada secuencia (en frames)
 GAP = 8               # Máximo número de frames consecutivos vacíos que se pueden interpolar
 
+#  Versión del preprocesado: subirla al cambiar el algoritmo para invalidar la caché
+PREPROCESS_VERSION = 1
+
 #  Índices de landmarks seleccionados (pose, cara y manos)
 LANDMARK_IDX = [0, 9, 11, 13, 14, 17, 117, 118, 119, 199, 346, 347, 348] + list(range(468, 543))
 
 class dataPreprocess:
-    def __init__(self, input_size=INPUT_SIZE, max_gap=GAP, landmark_idxs=LANDMARK_IDX):
+    def __init__(self, input_size=INPUT_SIZE, max_gap=GAP, landmark_idxs=LANDMARK_IDX, cache=None):
         self.input_size = input_size        # Frames por secuencia
         self.max_gap = max_gap              # Máximo tramo interpolable
         self.landmark_idxs = landmark_idxs  # Landmarks a conservar
+        self.cache = cache                  # ResultCache opcional (utils.cache)
+
+    def config(self):
+        """
+        Parámetros que afectan al resultado; forman parte de la clave de caché.
+        """
+        idxs = None if self.landmark_idxs is None else tuple(self.landmark_idxs)
+        return (PREPROCESS_VERSION, self.input_size, self.max_gap, idxs)
 
     def interpolate_missing(self, seq):
         """
@@ -53,6 +64,20 @@ class dataPreprocess:
     def __call__(self, video):
         """
         Preprocesamiento completo: interpolación, selección, padding y remuestreo.
+        Si hay caché, un clip ya visto con la misma configuración no se recalcula.
+        """
+        if self.cache is None:
+            return self.process(video)
+
+        key = self.cache.make_key("pre", video, self.config())
+        cached = self.cache.get(key, saved_bytes=video.nbytes)
+        if cached is not None:
+            return cached
+        return self.cache.put(key, self.process(video))
+
+    def process(self, video):
+        """
+        Preprocesamiento sin caché.
         """
         # Interpolar frames vacíos
         video = self.interpolate_missing(video)
@@ -70,10 +95,10 @@ class dataPreprocess:
             pad_left = pad_total // 2
             pad_right = pad_total - pad_left
             video = self.pad(video, pad_left, pad_right)
-            return video.astype(np.float32)
+            return video.astype(np.float32, copy=False)
 
         if T == N:
-            return video.astype(np.float32)
+            return video.astype(np.float32, copy=False)
 
         # Si la secuencia es más larga, repetir y hacer media
         repeat_factor = (N * N) // T
@@ -88,4 +113,4 @@ class dataPreprocess:
             video = self.pad(video, pad_left, pad_right)
 
         video = video.reshape(N, -1, L, D)
-        return video.mean(axis=1).astype(np.float32)
+        return video.mean(axis=1).astype(np.float32, copy=False)
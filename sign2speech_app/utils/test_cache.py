@@ -0,0 +1,149 @@
+"""
+Pruebas de ResultCache y de las claves versionadas del preprocesado y la inferencia.
+
+Ejecutar desde sign2speech_app/:  python -m pytest utils/test_cache.py
+"""
+import os
+
+import numpy as np
+import pytest
+
+from utils import cache as cache_module
+from utils import preprocess
+from utils.cache import ResultCache
+from utils.preprocess import dataPreprocess
+
+
+def _array(value, size=250):
+    return np.full(size, value, dtype=np.float32)  # 1000 bytes
+
+
+def test_memory_lru_evicts_least_recently_used_within_byte_cap():
+    cache = ResultCache(max_bytes=3000)
+    keys = [cache.make_key("probs", _array(i)) for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        cache.put(key, _array(i))
+
+    cache.get(keys[0])  # keys[1] pasa a ser el menos usado
+    cache.put(keys[3], _array(3))
+
+    assert cache.get(keys[1]) is None
+    assert all(cache.get(k) is not None for k in (keys[0], keys[2], keys[3]))
+    stats = cache.stats()
+    assert stats["bytes"] <= 3000
+    assert stats["evictions"] == 1
+
+
+def test_put_returns_read_only_array():
+    cache = ResultCache()
+    value = cache.put("probs-x", _array(1))
+    assert not value.flags.writeable
+
+
+def test_disk_tier_survives_new_instance_and_is_trimmed(tmp_path):
+    first = ResultCache(disk_dir=str(tmp_path))
+    keys = [first.make_key("probs", _array(i)) for i in range(3)]
+    for i, key in enumerate(keys):
+        first.put(key, _array(i))
+        # mtimes explícitos: la resolución del sistema de ficheros puede empatar
+        os.utime(tmp_path / f"{key}.npy", (1000 + i, 1000 + i))
+
+    second = ResultCache(disk_dir=str(tmp_path))
+    np.testing.assert_array_equal(second.get(keys[0]), _array(0))
+    assert second.stats()["namespaces"]["probs"]["disk_hits"] == 1
+
+    # El acierto refrescó keys[0]; al reabrir con sitio para dos ficheros sale keys[1]
+    file_size = os.path.getsize(tmp_path / f"{keys[0]}.npy")
+    third = ResultCache(disk_dir=str(tmp_path), max_disk_bytes=2 * file_size)
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{k}.npy" for k in (keys[0], keys[2]))
+    assert third.stats()["disk_evictions"] == 1
+    assert third.stats()["disk_bytes"] <= 2 * file_size
+
+
+def test_disk_tier_is_trimmed_on_put(tmp_path):
+    cache = ResultCache(disk_dir=str(tmp_path), max_disk_bytes=2500)
+    for i in range(3):
+        cache.put(cache.make_key("probs", _array(i)), _array(i))
+
+    assert len(os.listdir(tmp_path)) == 2
+    assert cache.stats()["disk_bytes"] <= 2500
+
+
+def test_clear_disk_removes_files(tmp_path):
+    cache = ResultCache(disk_dir=str(tmp_path))
+    key = cache.make_key("probs", _array(0))
+    cache.put(key, _array(0))
+
+    cache.clear(disk=True)
+
+    assert os.listdir(tmp_path) == []
+    assert cache.get(key) is None
+    assert cache.stats()["disk_bytes"] == 0
+
+
+def test_stats_track_served_and_saved_bytes_per_namespace():
+    cache = ResultCache()
+    key = cache.make_key("probs", _array(0))
+    assert cache.get(key, saved_bytes=67584) is None
+    cache.put(key, _array(0))
+    cache.get(key, saved_bytes=67584)
+
+    stats = cache.stats()["namespaces"]["probs"]
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["bytes_served"] == 1000
+    assert stats["bytes_saved"] == 67584
+
+
+def test_preprocess_version_change_misses(monkeypatch):
+    cache = ResultCache()
+    preprocessor = dataPreprocess(cache=cache)
+    clip = np.random.default_rng(0).random((35, 543, 3), dtype=np.float32)
+
+    first = preprocessor(clip)
+    np.testing.assert_array_equal(preprocessor(clip), first)
+    np.testing.assert_array_equal(first, dataPreprocess().process(clip))
+    assert cache.stats()["namespaces"]["pre"]["hits"] == 1
+
+    monkeypatch.setattr(preprocess, "PREPROCESS_VERSION", preprocess.PREPROCESS_VERSION + 1)
+    preprocessor(clip)
+    assert cache.stats()["namespaces"]["pre"]["misses"] == 2
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    from model import inference_dispatcher
+    from model.inference_dispatcher import DevicePool, FakeDevice
+
+    device = FakeDevice("fake", latency=0.0)
+    monkeypatch.setattr(inference_dispatcher, "_device_pool", DevicePool([device]))
+    monkeypatch.setattr(cache_module, "_default_cache", ResultCache())
+    return device
+
+
+def test_predict_words_dispatches_each_distinct_word_once(fake_pool):
+    from model.inference import predict_words
+
+    words = np.random.default_rng(0).random((2, 64, 88, 3), dtype=np.float32)
+    X = np.stack([words[0], words[1], words[0]])
+
+    first = predict_words(X)
+    assert fake_pool.calls == 2
+    assert first[0] == first[2]
+
+    assert predict_words(X) == first
+    assert fake_pool.calls == 2
+
+
+def test_model_version_change_misses(fake_pool, monkeypatch):
+    from model import inference_dispatcher
+    from model.inference import predict_words
+
+    X = np.random.default_rng(0).random((1, 64, 88, 3), dtype=np.float32)
+    predict_words(X)
+    predict_words(X)
+    assert fake_pool.calls == 1
+
+    monkeypatch.setattr(inference_dispatcher, "MODEL_VERSION", inference_dispatcher.MODEL_VERSION + 1)
+    predict_words(X)
+    assert fake_pool.calls == 2